@@ -10,6 +10,15 @@ READABLE_MIMES = {
     "text/html", "application/javascript"
 }
 
+# Bump whenever classification, sensitivity or summary logic changes so
+# results cached by an older analyzer are re-computed instead of reused.
+ANALYSIS_VERSION = 1
+
+# Max rows kept in analysis_cache; least recently used rows are evicted first.
+ANALYSIS_CACHE_MAX_ENTRIES = 10000
+# Extra rows dropped per eviction so it doesn't run again on the next insert.
+ANALYSIS_CACHE_EVICT_BATCH = 500
+
 class AnalysisManager:
     """Handles the database and orchestrates all AI analysis tasks."""
 
@@ -17,6 +26,8 @@ class AnalysisManager:
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self._create_table()
+        # Row count of analysis_cache, resynced whenever eviction runs
+        self._cache_rows = self.conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
 
     def _create_table(self):
         """Initializes the metadata database schema."""
@@ -33,15 +44,76 @@ class AnalysisManager:
                         is_sensitive BOOLEAN,
                         access_count INTEGER,
                         last_modified REAL,
-                        content_summary TEXT
+                        content_summary TEXT,
+                        analysis_version INTEGER
                     );
                 """)
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(file_index)")}
+                if "analysis_version" not in columns:
+                    self.conn.execute("ALTER TABLE file_index ADD COLUMN analysis_version INTEGER;")
+                    # Rows indexed before versioning came from the version 1 analyzer
+                    self.conn.execute("UPDATE file_index SET analysis_version = 1;")
                 self.conn.execute("""
                     CREATE INDEX IF NOT EXISTS idx_hash ON file_index (sha256_hash);
                 """)
                 self.conn.execute("""
                     CREATE INDEX IF NOT EXISTS idx_type ON file_index (file_type);
                 """)
+                # Analyzer outputs keyed by content hash, so copies, renames
+                # and restores of known content skip re-analysis.
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS analysis_cache (
+                        sha256_hash TEXT PRIMARY KEY,
+                        file_size INTEGER,
+                        analysis_version INTEGER,
+                        file_type TEXT,
+                        is_sensitive BOOLEAN,
+                        content_summary TEXT,
+                        last_used REAL
+                    );
+                """)
+                self.conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_cache_last_used ON analysis_cache (last_used);
+                """)
+                # Generation counters so readers (the dashboard, the search
+                # daemon) can tell whether anything changed without scanning
+                # the index itself. `generation` tracks files and their
+                # content; `access_generation` tracks access_count only, so
+                # reads through the mount don't invalidate search results.
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS index_state (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        generation INTEGER NOT NULL,
+                        access_generation INTEGER NOT NULL DEFAULT 0,
+                        created REAL NOT NULL
+                    );
+                """)
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(index_state)")}
+                if "access_generation" not in columns:
+                    self.conn.execute("""
+                        ALTER TABLE index_state
+                        ADD COLUMN access_generation INTEGER NOT NULL DEFAULT 0;
+                    """)
+                self.conn.execute("""
+                    INSERT OR IGNORE INTO index_state (id, generation, created)
+                    VALUES (1, 0, julianday('now'));
+                """)
+                # Older schemas bumped `generation` on every UPDATE
+                self.conn.execute("DROP TRIGGER IF EXISTS trg_generation_update;")
+                for name, event, counter in (
+                    ("insert", "INSERT", "generation"),
+                    ("delete", "DELETE", "generation"),
+                    ("content", "UPDATE OF filepath, filename, file_type, file_size, "
+                                "sha256_hash, is_sensitive, content_summary", "generation"),
+                    ("access", "UPDATE OF access_count", "access_generation"),
+                ):
+                    self.conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_generation_{name}
+                        AFTER {event} ON file_index
+                        BEGIN
+                            UPDATE index_state SET {counter} = {counter} + 1 WHERE id = 1;
+                        END;
+                    """)
         except Exception as e:
             logging.error(f"Error creating database table: {e}")
             raise
@@ -60,8 +132,92 @@ class AnalysisManager:
             logging.warning(f"Could not read content from {filepath}: {e}")
             return ""
 
-    def analyze_file(self, filepath, is_new=False):
-        """Runs all analysis tasks on a single file and updates the DB."""
+    def _get_cached_analysis(self, file_hash, file_size):
+        """
+        Returns ((file_type, is_sensitive, content_summary), from_cache) for
+        content already analyzed by the current ANALYSIS_VERSION, or (None, False).
+        """
+        if file_hash is None:
+            return None, False
+        cur = self.conn.execute("""
+            SELECT file_type, is_sensitive, content_summary FROM analysis_cache
+            WHERE sha256_hash = ? AND file_size = ? AND analysis_version = ?
+        """, (file_hash, file_size, ANALYSIS_VERSION))
+        row = cur.fetchone()
+        if row:
+            return row, True
+        # Fall back to any indexed file with the same content (uses idx_hash)
+        cur = self.conn.execute("""
+            SELECT file_type, is_sensitive, content_summary FROM file_index
+            WHERE sha256_hash = ? AND file_size = ? AND analysis_version = ? LIMIT 1
+        """, (file_hash, file_size, ANALYSIS_VERSION))
+        return cur.fetchone(), False
+
+    def _touch_cached_analysis(self, file_hash):
+        """Marks a cache entry as recently used so eviction keeps it."""
+        self.conn.execute(
+            "UPDATE analysis_cache SET last_used = julianday('now') WHERE sha256_hash = ?",
+            (file_hash,)
+        )
+
+    def _store_cached_analysis(self, file_hash, file_size, file_type, is_sensitive, content_summary):
+        """Records analyzer outputs for this content (or refreshes its LRU timestamp)."""
+        cur = self.conn.execute("""
+            UPDATE analysis_cache SET
+                file_size = ?, analysis_version = ?, file_type = ?,
+                is_sensitive = ?, content_summary = ?, last_used = julianday('now')
+            WHERE sha256_hash = ?
+        """, (
+            file_size, ANALYSIS_VERSION, file_type,
+            is_sensitive, content_summary, file_hash
+        ))
+        if cur.rowcount:
+            return
+
+        self.conn.execute("""
+            INSERT INTO analysis_cache (
+                sha256_hash, file_size, analysis_version, file_type,
+                is_sensitive, content_summary, last_used
+            ) VALUES (?, ?, ?, ?, ?, ?, julianday('now'))
+        """, (
+            file_hash, file_size, ANALYSIS_VERSION, file_type,
+            is_sensitive, content_summary
+        ))
+        self._cache_rows += 1
+        if self._cache_rows > ANALYSIS_CACHE_MAX_ENTRIES:
+            self._evict_analysis_cache()
+
+    def _evict_analysis_cache(self):
+        """Trims analysis_cache below ANALYSIS_CACHE_MAX_ENTRIES in one batch, oldest first."""
+        # Other processes share the table, so recount before deleting anything
+        self._cache_rows = self.conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        excess = self._cache_rows - ANALYSIS_CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+        cur = self.conn.execute("""
+            DELETE FROM analysis_cache WHERE sha256_hash IN (
+                SELECT sha256_hash FROM analysis_cache ORDER BY last_used ASC LIMIT ?
+            )
+        """, (excess + ANALYSIS_CACHE_EVICT_BATCH,))
+        self._cache_rows -= cur.rowcount
+
+    def cache_analysis(self, filepath):
+        """Adds an indexed file's analysis to analysis_cache once its content is final."""
+        row = self.conn.execute("""
+            SELECT sha256_hash, file_size, file_type, is_sensitive, content_summary
+            FROM file_index WHERE filepath = ? AND analysis_version = ?
+        """, (filepath, ANALYSIS_VERSION)).fetchone()
+        if row is None or row[0] is None:
+            return
+        with self.conn:
+            self._store_cached_analysis(*row)
+
+    def analyze_file(self, filepath, is_new=False, cache_result=True):
+        """
+        Runs all analysis tasks on a single file and updates the DB.
+        Pass cache_result=False while the content is still being written, so
+        partial contents don't fill analysis_cache; call cache_analysis() later.
+        """
         if not os.path.exists(filepath) or os.path.isdir(filepath):
             return
 
@@ -71,20 +227,33 @@ class AnalysisManager:
             file_size = file_stat.st_size
             last_modified = file_stat.st_mtime
             
-            # 1. Classification
-            file_type = classification.get_file_type(filepath)
-            
-            # 2. Hashing (for duplicates)
+            # 1. Hashing (for duplicates, and as the analysis cache key)
             file_hash = duplicates.hash_file(filepath)
-            
-            # 3. Sensitivity Check
-            is_sensitive = permissions.check_sensitivity(filepath, file_type)
-            
-            # 4. Content Summary (FIXED)
-            content_summary = self._get_content_summary(filepath, file_type)
-            
-            # 5. Database Update
+
+            # 2. Reuse results if this exact content was analyzed before
+            cached, from_cache = self._get_cached_analysis(file_hash, file_size)
+            if cached:
+                file_type, is_sensitive, content_summary = cached
+                logging.info(f"Reusing cached analysis for {filepath}")
+            else:
+                # 3. Classification
+                file_type = classification.get_file_type(filepath)
+
+                # 4. Sensitivity Check
+                is_sensitive = permissions.check_sensitivity(filepath, file_type)
+
+                # 5. Content Summary
+                content_summary = self._get_content_summary(filepath, file_type)
+
+            # 6. Database Update
             with self.conn:
+                if file_hash is not None and cache_result:
+                    self._store_cached_analysis(
+                        file_hash, file_size, file_type, is_sensitive, content_summary
+                    )
+                elif from_cache:
+                    self._touch_cached_analysis(file_hash)
+
                 # Determine access_count value
                 access_count_val = 0
                 if not is_new:
@@ -98,8 +267,9 @@ class AnalysisManager:
                 self.conn.execute("""
                     INSERT INTO file_index (
                         filepath, filename, file_type, file_size, sha256_hash, 
-                        is_sensitive, access_count, last_modified, content_summary
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        is_sensitive, access_count, last_modified, content_summary,
+                        analysis_version
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ON CONFLICT(filepath) DO UPDATE SET
                         filename=excluded.filename,
                         file_type=excluded.file_type,
@@ -108,11 +278,12 @@ class AnalysisManager:
                         is_sensitive=excluded.is_sensitive,
                         last_modified=excluded.last_modified,
                         content_summary=excluded.content_summary,
+                        analysis_version=excluded.analysis_version,
                         access_count=file_index.access_count -- Keep old access_count on update
                 """, (
                     filepath, filename, file_type, file_size, file_hash,
                     is_sensitive, access_count_val,
-                    last_modified, content_summary
+                    last_modified, content_summary, ANALYSIS_VERSION
                 ))
             logging.info(f"Successfully analyzed and indexed: {filepath}")
 
@@ -1,8 +1,8 @@
-import magic
 import logging
 
 def get_file_type(filepath):
     """Uses python-magic to determine the MIME type of a file."""
+    import magic # Imported lazily; libmagic is slow to load
     try:
         mime = magic.Magic(mime=True)
         file_type = mime.from_file(filepath)
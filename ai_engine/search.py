@@ -1,12 +1,47 @@
 import sqlite3
 import sys
-import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import os
+import json
+import socket
+import logging
+
+# scikit-learn is imported lazily inside SmartSearch so that the thin client
+# path (asking a running daemon) starts without paying for it.
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+def default_socket_path(db_path):
+    """Returns the Unix socket the search daemon listens on for a given DB."""
+    return os.path.splitext(os.path.abspath(db_path))[0] + '.sock'
+
+def query_daemon(socket_path, query, limit=5, timeout=5.0):
+    """
+    Sends a query to a running search daemon.
+    Returns a list of (score, filepath) pairs, or None if no daemon answered.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            request = json.dumps({"query": query, "limit": limit})
+            sock.sendall(request.encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                reply = json.loads(f.readline())
+    except (OSError, ValueError) as e:
+        logging.debug(f"Search daemon unavailable at {socket_path}: {e}")
+        return None
+
+    if not isinstance(reply, dict):
+        logging.warning(f"Malformed reply from search daemon: {reply!r}")
+        return None
+    if "error" in reply:
+        logging.warning(f"Search daemon error: {reply['error']}")
+        return None
+    try:
+        return [(float(score), filepath) for score, filepath in reply["results"]]
+    except (KeyError, TypeError, ValueError) as e:
+        logging.warning(f"Malformed reply from search daemon: {e}")
+        return None
 
 class SmartSearch:
     """Performs natural language search over the file index."""
@@ -14,11 +49,14 @@ class SmartSearch:
         if not os.path.exists(db_path):
             print(f"Error: Database file not found at {db_path}")
             sys.exit(1)
-            
+
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
-        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self.vectorizer = None
+        self.tfidf_matrix = None
+        self.filepaths = []
+        self._data_version = None
 
     def _get_all_files(self):
         """Fetches all file data from the index."""
@@ -31,60 +69,168 @@ class SmartSearch:
             logging.error(f"Error fetching files from DB: {e}")
             return []
 
-    def search(self, query):
-        """Searches the index for files matching the query."""
+    def _current_data_version(self):
+        """
+        Returns a token that changes whenever the searchable index does.
+        Uses the index_state generation, which ignores access-count updates,
+        and falls back to SQLite's data_version on older databases.
+        """
+        try:
+            row = self.conn.execute("SELECT created, generation FROM index_state WHERE id = 1").fetchone()
+            if row:
+                return tuple(row)
+        except sqlite3.OperationalError:
+            pass
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def build_index(self):
+        """Fits the TF-IDF model over every file currently in the index."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self._data_version = self._current_data_version()
         all_files = self._get_all_files()
-        if not all_files:
-            print("No files in the index.")
-            return
 
-        # --- FIX ---
         # Create a "document" for each file by combining its name
-        # and its content summary. This is much smarter.
-        # We also "boost" the filename by adding it twice.
+        # and its content summary. We also "boost" the filename by adding it twice.
         documents = [
-            f"{doc['filename']} {doc['filename']} {doc['content_summary']}" 
+            f"{doc['filename']} {doc['filename']} {doc['content_summary'] or ''}"
             for doc in all_files
         ]
-        filepaths = [doc['filepath'] for doc in all_files]
-        # -----------
-        
-        # Build TF-IDF matrix
+        self.filepaths = [doc['filepath'] for doc in all_files]
+        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self.tfidf_matrix = None
+
+        if not documents:
+            return
         try:
-            tfidf_matrix = self.vectorizer.fit_transform(documents)
-            query_vec = self.vectorizer.transform([query])
+            self.tfidf_matrix = self.vectorizer.fit_transform(documents)
         except ValueError as e:
-            print(f"No valid data to search. Index might be empty. Error: {e}")
+            logging.warning(f"No valid data to search. Index might be empty. Error: {e}")
+
+    def refresh(self):
+        """Rebuilds the index only if the database changed since the last build."""
+        if self._data_version != self._current_data_version():
+            self.build_index()
+
+    def rank(self, query, limit=5):
+        """Returns up to `limit` (score, filepath) pairs, best match first."""
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        self.refresh()
+        if self.tfidf_matrix is None:
+            return []
+
+        query_vec = self.vectorizer.transform([query])
+        cosine_sims = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
+
+        top_indices = cosine_sims.argsort()[-limit:][::-1] # Top indices, descending
+        return [
+            (float(cosine_sims[i]), self.filepaths[i])
+            for i in top_indices
+            if cosine_sims[i] > 0.01 # Set a minimum threshold
+        ]
+
+    def search(self, query):
+        """Searches the index for files matching the query."""
+        results = self.rank(query)
+        if not self.filepaths:
+            print("No files in the index.")
             return
+        print_results(query, results)
+
+def print_results(query, results):
+    """Prints ranked results in the CLI format."""
+    print(f"--- Search Results for '{query}' ---")
+    for score, filepath in results:
+        print(f"  {'+' * int(score * 5)} [{score:.2f}] {filepath}")
+    if not results:
+        print("No relevant files found.")
+
+def serve(db_path, socket_path=None):
+    """Keeps a warm SmartSearch index and answers queries on a Unix socket."""
+    import signal
+    import socketserver
+
+    socket_path = socket_path or default_socket_path(db_path)
+    searcher = SmartSearch(db_path)
+    searcher.build_index()
 
-        # Calculate cosine similarity
-        cosine_sims = cosine_similarity(query_vec, tfidf_matrix).flatten()
-
-        # Get top 5 results with a score > 0
-        top_indices = cosine_sims.argsort()[-5:][::-1] # Top 5 indices, descending
-        
-        print(f"--- Search Results for '{query}' ---")
-        
-        found_results = False
-        for i in top_indices:
-            score = cosine_sims[i]
-            if score > 0.01: # Set a minimum threshold
-                print(f"  {'+' * int(score * 5)} [{score:.2f}] {filepaths[i]}")
-                found_results = True
-        
-        if not found_results:
-            print("No relevant files found.")
+    class SearchHandler(socketserver.StreamRequestHandler):
+        # The server is single-threaded; don't let a stalled client wedge it
+        timeout = 5
+
+        def handle(self):
+            try:
+                line = self.rfile.readline()
+            except OSError as e:
+                logging.warning(f"Dropping stalled search client: {e}")
+                return
+            if not line:
+                return # Client closed without a request (e.g. a liveness probe)
+            try:
+                request = json.loads(line)
+                results = searcher.rank(request["query"], int(request.get("limit", 5)))
+                reply = {"results": results}
+            except Exception as e:
+                logging.error(f"Error answering search request: {e}")
+                reply = {"error": str(e)}
+            try:
+                self.wfile.write(json.dumps(reply).encode('utf-8') + b"\n")
+            except OSError as e:
+                logging.warning(f"Could not send search reply: {e}")
+
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.settimeout(1.0)
+                probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path) # Stale socket from a previous run
+        else:
+            print(f"Error: A search daemon is already listening on {socket_path}")
+            sys.exit(1)
+
+    # Create the socket owner-only from the start; it exposes file paths
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, SearchHandler)
+    finally:
+        os.umask(old_umask)
+    # Exit through the cleanup below on `kill` as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    logging.info(f"Search daemon ready. DB: {db_path}, Socket: {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
 
 def main():
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--daemon":
+        serve(sys.argv[2])
+        return
+
     if len(sys.argv) != 3:
         print("Usage: python ai_engine/search.py <db_path> <query>")
+        print("       python ai_engine/search.py --daemon <db_path>")
         sys.exit(1)
-    
+
     db_path = sys.argv[1]
     query = sys.argv[2]
-    
+
+    # Prefer the warm daemon; fall back to building the index in-process.
+    results = query_daemon(default_socket_path(db_path), query)
+    if results is not None:
+        print_results(query, results)
+        return
+
     searcher = SmartSearch(db_path)
     searcher.search(query)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
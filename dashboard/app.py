@@ -4,16 +4,17 @@ import sqlite3
 import platform
 import subprocess
 import time
-from flask import Flask, render_template, jsonify, request
+import gzip
+import threading
+from collections import OrderedDict
+from flask import Flask, render_template, jsonify, request, Response
 
 # --- PROJECT SETUP ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from ai_engine.analysis_manager import AnalysisManager
+from ai_engine import search as smart_search
 
 app = Flask(__name__)
 
@@ -21,8 +22,21 @@ app = Flask(__name__)
 DB_PATH = os.path.join(project_root, 'metadata', 'file_index.db')
 MOUNT_POINT = os.path.join(project_root, 'my_fs')
 STORAGE_BACKEND = os.path.join(project_root, 'storage_backend')
+SEARCH_SOCKET = smart_search.default_socket_path(DB_PATH)
+GZIP_MIN_SIZE = 1024        # Smaller payloads aren't worth compressing
+RESPONSE_CACHE_LIMIT = 256  # Max cached (endpoint, query) bodies
 
-analyzer = AnalysisManager(DB_PATH)
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
+    """Creates the AnalysisManager on first use instead of at import time."""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            from ai_engine.analysis_manager import AnalysisManager
+            _analyzer = AnalysisManager(DB_PATH)
+    return _analyzer
 
 def get_db_connection():
     if not os.path.exists(DB_PATH): return None
@@ -32,12 +46,71 @@ def get_db_connection():
         return conn
     except sqlite3.OperationalError: return None
 
+def get_index_version(include_access=False):
+    """
+    Reads the index generation counters without touching file_index.
+    Access counts only matter to stats, so search ignores access_generation.
+    """
+    conn = get_db_connection()
+    if not conn: return None
+    try:
+        row = conn.execute("SELECT generation, access_generation, created FROM index_state WHERE id = 1").fetchone()
+        if not row: return None
+        version = f"{row['created']:.6f}-{row['generation']}"
+        return f"{version}-{row['access_generation']}" if include_access else version
+    except sqlite3.OperationalError: return None  # DB predates index_state
+    finally: conn.close()
+
+# --- RESPONSE CACHE ---
+# Serialized API responses keyed by (endpoint, query), valid for one index generation.
+# Kept in LRU order so a burst of search queries evicts old queries, not the stats body.
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def cached_json_response(kind, key, build, include_access=False):
+    """
+    Serves build()'s JSON with a weak ETag tied to the index generation.
+    Answers If-None-Match with 304, reuses the serialized body until the
+    generation changes, and gzips large payloads.
+    """
+    version = get_index_version(include_access)
+    if version is None: return build()
+    tag = f"{kind}-{version}"
+
+    if request.if_none_match.contains_weak(tag):
+        response = Response(status=304)
+    else:
+        with _response_cache_lock:
+            entry = _response_cache.get((kind, key))
+            if entry is not None: _response_cache.move_to_end((kind, key))
+        if entry is None or entry['tag'] != tag:
+            built = app.make_response(build())
+            if built.status_code != 200: return built
+            body = built.get_data()
+            entry = {"tag": tag, "body": body, "gzip": gzip.compress(body) if len(body) >= GZIP_MIN_SIZE else None}
+            with _response_cache_lock:
+                _response_cache[(kind, key)] = entry
+                _response_cache.move_to_end((kind, key))
+                while len(_response_cache) > RESPONSE_CACHE_LIMIT: _response_cache.popitem(last=False)
+
+        use_gzip = entry['gzip'] is not None and request.accept_encodings['gzip'] > 0
+        response = Response(entry['gzip'] if use_gzip else entry['body'], mimetype='application/json')
+        if use_gzip: response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(tag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def index(): return render_template('index.html')
 
 # --- API: STATISTICS ---
 @app.route('/api/stats')
 def api_stats():
+    return cached_json_response('stats', None, build_stats, include_access=True)
+
+def build_stats():
     conn = get_db_connection()
     if not conn:
         return jsonify({"error": "Database not found. Please run Terminal 1 first."}), 500
@@ -136,6 +209,14 @@ def api_stats():
 def api_search():
     query = request.args.get('q', '')
     if not query: return jsonify([])
+    return cached_json_response('search', query, lambda: build_search(query))
+
+def build_search(query):
+    # Ask the warm search daemon first; fall back to an in-process TF-IDF pass.
+    ranked = smart_search.query_daemon(SEARCH_SOCKET, query, limit=10)
+    if ranked is not None:
+        return jsonify([{"filepath": fp, "name": os.path.basename(fp), "score": round(score, 2)} for score, fp in ranked])
+
     conn = get_db_connection()
     if not conn: return jsonify([])
     try:
@@ -148,6 +229,8 @@ def api_search():
         documents = [f"{r['filename']} {r['filename']} {r['content_summary'] or ''}" for r in rows]
         filepaths = [r['filepath'] for r in rows]
 
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
         vectorizer = TfidfVectorizer(stop_words='english')
         try:
             tfidf_matrix = vectorizer.fit_transform(documents)
@@ -180,7 +263,7 @@ def create_file():
         else:
             with open(storage_path, 'w') as f: f.write(content)
 
-        analyzer.analyze_file(storage_path, is_new=True)
+        get_analyzer().analyze_file(storage_path, is_new=True)
         return jsonify({"status": "success"})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
@@ -196,8 +279,8 @@ def delete_file():
         if os.path.exists(mount_path): os.remove(mount_path)
         elif os.path.exists(storage_path): os.remove(storage_path)
         
-        analyzer.remove_file(mount_path)
-        analyzer.remove_file(storage_path)
+        get_analyzer().remove_file(mount_path)
+        get_analyzer().remove_file(storage_path)
         return jsonify({"status": "success"})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
@@ -210,7 +293,7 @@ def open_file():
         else: return jsonify({"error": "File not found"}), 404
 
     try:
-        analyzer.log_access(filepath)
+        get_analyzer().log_access(filepath)
         if platform.system() == 'Windows': os.startfile(filepath)
         elif platform.system() == 'Darwin': subprocess.call(('open', filepath))
         else: 
@@ -18,6 +18,8 @@ class InsightFS(Operations):
     def __init__(self, root, db_path):
         self.root = root
         self.db_path = db_path
+        # Paths written since they were opened; their analysis is cached on release
+        self._written = set()
         # Initialize the analysis manager which also sets up the DB
         try:
             self.analyzer = analysis_manager.AnalysisManager(self.db_path)
@@ -78,7 +80,9 @@ class InsightFS(Operations):
         # This should be asynchronous in a real system!
         try:
             logging.info(f"Triggering analysis for {path}...")
-            self.analyzer.analyze_file(full_path)
+            # Content may still be partial, so don't add it to the analysis cache yet
+            self.analyzer.analyze_file(full_path, cache_result=False)
+            self._written.add(full_path)
             logging.info(f"Analysis complete for {path}.")
         except Exception as e:
             logging.error(f"Failed to analyze {path}: {e}")
@@ -142,6 +146,15 @@ class InsightFS(Operations):
         return os.open(full_path, flags)
 
     def release(self, path, fh):
+        full_path = self._full_path(path)
+        if full_path in self._written:
+            self._written.discard(full_path)
+            # --- AI Feature: Cache analysis of the final content ---
+            try:
+                self.analyzer.cache_analysis(full_path)
+            except Exception as e:
+                logging.warning(f"Failed to cache analysis for {path}: {e}")
+            # --- End AI Feature ---
         return os.close(fh)
 
     def truncate(self, path, length, fh=None):